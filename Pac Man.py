@@ -1,12 +1,15 @@
+import os
 import pygame
 import sys
 import random
-import math
 from collections import deque
 
 
 
 
+HEADLESS = False
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
 pygame.init()
 FPS = 30
 clock = pygame.time.Clock()
@@ -17,6 +20,8 @@ RIGHT = 4
 UP = 3
 LEFT = 2
 DOWN = 1
+DIRECTION_DELTAS = {RIGHT: (1, 0), UP: (0, -1), LEFT: (-1, 0), DOWN: (0, 1)}
+NEIGHBOR_STEPS = ((LEFT, -1, 0), (RIGHT, 1, 0), (UP, 0, -1), (DOWN, 0, 1))
 BLACK = (0, 0, 0)
 WALL_COLOR = (52, 45, 202)
 WALL_INNER_COLOR = (0, 0, 0)
@@ -28,6 +33,8 @@ WIDTH = block_size * MAP_COLS
 HEIGHT = block_size * MAP_ROWS + 40
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Mario's Pacman")
+hud_font = pygame.font.SysFont("Arial", 20)
+lives_text = hud_font.render("Lives: ", True, TEXT_COLOR)
 
 
 
@@ -58,6 +65,22 @@ game_map_layout = [
 ]
 
 
+wall_grid = [[cell == 1 for cell in row] for row in game_map_layout]
+wall_row_masks = [sum(1 << col for col, cell in enumerate(row) if cell == 1) for row in game_map_layout]
+
+
+def find_open_neighbors(col, row):
+    neighbors = []
+    for d, dx, dy in NEIGHBOR_STEPS:
+        nx, ny = col + dx, row + dy
+        if 0 <= ny < MAP_ROWS and 0 <= nx < MAP_COLS and not wall_grid[ny][nx]:
+            neighbors.append((d, (nx, ny)))
+    return tuple(neighbors)
+
+
+open_neighbors = {(col, row): find_open_neighbors(col, row) for row in range(MAP_ROWS) for col in range(MAP_COLS)}
+
+
 
 
 random_targets = [
@@ -69,16 +92,44 @@ random_targets = [
     ((MAP_COLS - 2) * block_size, block_size),
     ((MAP_COLS - 2) * block_size, (MAP_ROWS - 2) * block_size)
 ]
+random_target_tiles = [(x // block_size, y // block_size) for x, y in random_targets]
 
 
 
 score = 0
 lives = 3
+score_text = None
+score_text_value = None
 ghost_count = 4
 def copy_map(m):
     return [row[:] for row in m]
 
 
+sprite_cache = {}
+
+
+def get_circle_sprite(color, size):
+    key = (color, size)
+    sprite = sprite_cache.get(key)
+    if sprite is None:
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(sprite, color, (size // 2, size // 2), size // 2)
+        sprite_cache[key] = sprite
+    return sprite
+
+
+def hits_wall(x, y, size):
+    left = max(x // block_size, 0)
+    right = min((x + size - 1) // block_size, MAP_COLS - 1)
+    if left > right:
+        return False
+    span = ((1 << (right + 1)) - 1) ^ ((1 << left) - 1)
+    for map_y in (y // block_size, (y + size - 1) // block_size):
+        if 0 <= map_y < MAP_ROWS and wall_row_masks[map_y] & span:
+            return True
+    return False
+
+
 
 
 
@@ -96,19 +147,19 @@ class Pacman:
 
         
     def get_map_x(self):
-        return int(self.x // block_size)
+        return self.x // block_size
     
 
     def get_map_y(self):
-        return int(self.y // block_size)
+        return self.y // block_size
     
 
     def get_map_x_right_side(self):
-        return int((self.x + self.size - 1) // block_size)
+        return (self.x + self.size - 1) // block_size
     
 
     def get_map_y_bottom_side(self):
-        return int((self.y + self.size - 1) // block_size)
+        return (self.y + self.size - 1) // block_size
     
 
     def update_animation(self, dt):
@@ -129,56 +180,24 @@ class Pacman:
             self.y += self.speed
 
 
-    def move_backwards(self):
-        if self.direction == RIGHT:
-            self.x -= self.speed
-        elif self.direction == UP:
-            self.y += self.speed
-        elif self.direction == LEFT:
-            self.x += self.speed
-        elif self.direction == DOWN:
-            self.y -= self.speed
-
+    def can_move(self, direction):
+        dx, dy = DIRECTION_DELTAS[direction]
+        return not hits_wall(self.x + dx * self.speed, self.y + dy * self.speed, self.size)
 
-    def check_collisions(self, game_map):
-        corners = [
-            (self.x, self.y),
-            (self.x + self.size - 1, self.y),
-            (self.x, self.y + self.size - 1),
-            (self.x + self.size - 1, self.y + self.size - 1)
-        ]
-
-
-        for cx, cy in corners:
-            map_x = int(cx // block_size)
-            map_y = int(cy // block_size)
-            if map_y < 0 or map_y >= len(game_map) or map_x < 0 or map_x >= len(game_map[0]):
-                continue
-            if game_map[map_y][map_x] == 1:
-                return True
-        return False
-    
 
 
     def change_direction_if_possible(self, game_map):
         if self.direction == self.next_direction:
             return
-        original_direction = self.direction
-        self.direction = self.next_direction
-        self.move_forwards()
-        if self.check_collisions(game_map):
-            self.move_backwards()
-            self.direction = original_direction
-        else:
-            self.move_backwards()
+        if self.can_move(self.next_direction):
+            self.direction = self.next_direction
 
 
 
     def move_process(self, game_map):
         self.change_direction_if_possible(game_map)
-        self.move_forwards()
-        if self.check_collisions(game_map):
-            self.move_backwards()
+        if self.can_move(self.direction):
+            self.move_forwards()
 
 
 
@@ -186,11 +205,13 @@ class Pacman:
         global score
         map_x = self.get_map_x()
         map_y = self.get_map_y()
-        if map_y < 0 or map_y >= len(game_map) or map_x < 0 or map_x >= len(game_map[0]):
+        if map_y < 0 or map_y >= MAP_ROWS or map_x < 0 or map_x >= MAP_COLS:
             return
         if game_map[map_y][map_x] == 2:
             game_map[map_y][map_x] = 3
             score += 1
+            if not HEADLESS:
+                background.fill(BLACK, get_food_rect(map_x, map_y))
 
 
 
@@ -198,8 +219,7 @@ class Pacman:
     def draw(self, surface):
         center = (int(self.x + self.size / 2), int(self.y + self.size / 2))
         radius = self.size // 2
-        open_angle = (self.current_frame / self.frame_count) * 45
-        pygame.draw.circle(surface, PACMAN_COLOR, center, radius)
+        surface.blit(get_circle_sprite(PACMAN_COLOR, self.size), (center[0] - radius, center[1] - radius))
 
 
 
@@ -212,43 +232,27 @@ class Ghost:
         self.speed = speed
         self.direction = RIGHT
         self.range_radius = range_radius
+        self.range_radius_sq = range_radius * range_radius
         self.random_target_index = target_index
-        self.target = random_targets[self.random_target_index]
+        self.target_tile = random_target_tiles[self.random_target_index]
         self.last_random_change = pygame.time.get_ticks()
 
 
 
     def get_map_x(self):
-        return int(self.x // block_size)
+        return self.x // block_size
     
 
     def get_map_y(self):
-        return int(self.y // block_size)
+        return self.y // block_size
     
 
     def get_map_x_right_side(self):
-        return int((self.x + self.size - 1) // block_size)
+        return (self.x + self.size - 1) // block_size
     
 
     def get_map_y_bottom_side(self):
-        return int((self.y + self.size - 1) // block_size)
-    
-
-    def check_collisions(self, game_map):
-        corners = [
-            (self.x, self.y),
-            (self.x + self.size - 1, self.y),
-            (self.x, self.y + self.size - 1),
-            (self.x + self.size - 1, self.y + self.size - 1)
-        ]
-        for cx, cy in corners:
-            map_x = int(cx // block_size)
-            map_y = int(cy // block_size)
-            if map_y < 0 or map_y >= len(game_map) or map_x < 0 or map_x >= len(game_map[0]):
-                continue
-            if game_map[map_y][map_x] == 1:
-                return True
-        return False
+        return (self.y + self.size - 1) // block_size
     
 
 
@@ -263,45 +267,39 @@ class Ghost:
             self.y += self.speed
 
 
-    def move_backwards(self):
-        if self.direction == RIGHT:
-            self.x -= self.speed
-        elif self.direction == UP:
-            self.y += self.speed
-        elif self.direction == LEFT:
-            self.x += self.speed
-        elif self.direction == DOWN:
-            self.y -= self.speed
+    def can_move(self, direction):
+        dx, dy = DIRECTION_DELTAS[direction]
+        return not hits_wall(self.x + dx * self.speed, self.y + dy * self.speed, self.size)
 
 
     def is_in_range(self, pacman):
         dx = self.get_map_x() - pacman.get_map_x()
         dy = self.get_map_y() - pacman.get_map_y()
-        distance = math.sqrt(dx * dx + dy * dy)
-        return distance <= self.range_radius
+        return dx * dx + dy * dy <= self.range_radius_sq
     
 
     def change_random_direction(self):
         self.random_target_index = (self.random_target_index + 1) % len(random_targets)
-        self.target = random_targets[self.random_target_index]
+        self.target_tile = random_target_tiles[self.random_target_index]
 
 
     def calculate_new_direction(self, game_map, dest_x, dest_y):
         start = (self.get_map_x(), self.get_map_y())
-        queue = deque()
-        queue.append((start, []))
-        visited = set()
-        visited.add(start)
+        dest = (dest_x, dest_y)
+        first_moves = {start: None}
+        queue = deque([start])
         while queue:
-            current, moves = queue.popleft()
-            if current == (dest_x, dest_y):
-                return moves[0] if moves else self.direction
-            for d, (dx, dy) in zip([LEFT, RIGHT, UP, DOWN], [(-1, 0), (1, 0), (0, -1), (0, 1)]):
-                nx, ny = current[0] + dx, current[1] + dy
-                if 0 <= ny < len(game_map) and 0 <= nx < len(game_map[0]):
-                    if game_map[ny][nx] != 1 and (nx, ny) not in visited:
-                        visited.add((nx, ny))
-                        queue.append(((nx, ny), moves + [d]))
+            current = queue.popleft()
+            first_move = first_moves[current]
+            if current == dest:
+                return first_move or self.direction
+            neighbors = open_neighbors.get(current)
+            if neighbors is None:
+                neighbors = find_open_neighbors(current[0], current[1])
+            for d, neighbor in neighbors:
+                if neighbor not in first_moves:
+                    first_moves[neighbor] = first_move or d
+                    queue.append(neighbor)
         return self.direction
     
 
@@ -313,30 +311,23 @@ class Ghost:
         if self.is_in_range(pacman):
             dest = (pacman.get_map_x(), pacman.get_map_y())
         else:
-            dest = (int(self.target[0] // block_size), int(self.target[1] // block_size))
+            dest = self.target_tile
         new_dir = self.calculate_new_direction(game_map, dest[0], dest[1])
-        old_dir = self.direction
-        self.direction = new_dir
-        self.move_forwards()
-        if self.check_collisions(game_map):
-            self.move_backwards()
-            self.direction = old_dir
-        else:
-            self.move_backwards()
+        if self.can_move(new_dir):
+            self.direction = new_dir
 
 
     def move_process(self, game_map, pacman):
         self.change_direction_if_possible(game_map, pacman)
-        self.move_forwards()
-        if self.check_collisions(game_map):
-            self.move_backwards()
+        if self.can_move(self.direction):
+            self.move_forwards()
 
 
 
     def draw(self, surface):
         center = (int(self.x + self.size / 2), int(self.y + self.size / 2))
         radius = self.size // 2
-        pygame.draw.circle(surface, GHOST_COLOR, center, radius)
+        surface.blit(get_circle_sprite(GHOST_COLOR, self.size), (center[0] - radius, center[1] - radius))
         pygame.draw.circle(surface, (255, 100, 100), center, int(self.range_radius * block_size), 1)
 
 
@@ -366,20 +357,32 @@ def draw_walls(surface, game_map):
                     pygame.draw.rect(surface, WALL_INNER_COLOR, inner_rect)
 
 
+def get_food_rect(col, row):
+    return pygame.Rect(col * block_size + block_size / 3, row * block_size + block_size / 3, block_size / 3, block_size / 3)
+
+
 def draw_foods(surface, game_map):
     for row in range(len(game_map)):
         for col in range(len(game_map[0])):
             if game_map[row][col] == 2:
-                food_rect = pygame.Rect(col * block_size + block_size / 3, row * block_size + block_size / 3, block_size / 3, block_size / 3)
-                pygame.draw.rect(surface, FOOD_COLOR, food_rect)
+                pygame.draw.rect(surface, FOOD_COLOR, get_food_rect(col, row))
+
+
+def create_background(game_map):
+    surface = pygame.Surface((WIDTH, HEIGHT)).convert()
+    surface.fill(BLACK)
+    draw_walls(surface, game_map)
+    draw_foods(surface, game_map)
+    return surface
 
 
 
 def draw_score_and_lives(surface):
-    font = pygame.font.SysFont("Arial", 20)
-    score_text = font.render("Score: " + str(score), True, TEXT_COLOR)
+    global score_text, score_text_value
+    if score_text_value != score:
+        score_text = hud_font.render("Score: " + str(score), True, TEXT_COLOR)
+        score_text_value = score
     surface.blit(score_text, (10, block_size * MAP_ROWS + 10))
-    lives_text = font.render("Lives: ", True, TEXT_COLOR)
     surface.blit(lives_text, (WIDTH - 150, block_size * MAP_ROWS + 10))
     for i in range(lives):
         pygame.draw.circle(surface, PACMAN_COLOR, (WIDTH - 80 + i * (block_size + 5), block_size * MAP_ROWS + 20), block_size // 2)
@@ -387,7 +390,7 @@ def draw_score_and_lives(surface):
 
 
 def create_new_pacman():
-    return Pacman(block_size, block_size, block_size, block_size / 5)
+    return Pacman(block_size, block_size, block_size, block_size // 5)
 
 
 def create_ghosts():
@@ -395,7 +398,7 @@ def create_ghosts():
     for i in range(ghost_count * 2):
         init_x = 9 * block_size + (0 if i % 2 == 0 else 1) * block_size
         init_y = 10 * block_size + (0 if i % 2 == 0 else 1) * block_size
-        ghost_speed = (block_size / 5) / 2
+        ghost_speed = block_size // 10
         range_radius = 6 + i
         ghosts.append(Ghost(init_x, init_y, block_size, ghost_speed, range_radius, target_index=i % len(random_targets)))
     return ghosts
@@ -407,17 +410,18 @@ def update_game(pacman, ghosts, game_map):
     pacman.eat(game_map)
     for ghost in ghosts:
         ghost.move_process(game_map, pacman)
+    pacman_x, pacman_y = pacman.get_map_x(), pacman.get_map_y()
     for ghost in ghosts:
-        if ghost.get_map_x() == pacman.get_map_x() and ghost.get_map_y() == pacman.get_map_y():
+        if ghost.get_map_x() == pacman_x and ghost.get_map_y() == pacman_y:
             handle_ghost_collision()
             break
 
 
 
 def draw_game(pacman, ghosts, game_map):
-    screen.fill(BLACK)
-    draw_walls(screen, game_map)
-    draw_foods(screen, game_map)
+    if HEADLESS:
+        return
+    screen.blit(background, (0, 0))
     for ghost in ghosts:
         ghost.draw(screen)
     pacman.draw(screen)
@@ -437,6 +441,7 @@ def handle_ghost_collision():
         pygame.quit()
         sys.exit()
 game_map = copy_map(game_map_layout)
+background = create_background(game_map)
 pacman_obj = create_new_pacman()
 ghosts_obj = create_ghosts()
 running = True
@@ -450,7 +455,7 @@ while running:
 
 
 
-    dt = clock.tick(FPS)
+    dt = clock.tick(0 if HEADLESS else FPS)
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
@@ -470,7 +475,8 @@ while running:
 
     pacman_obj.update_animation(dt)
     update_game(pacman_obj, ghosts_obj, game_map)
-    draw_game(pacman_obj, ghosts_obj, game_map)
+    if pygame.display.get_active():
+        draw_game(pacman_obj, ghosts_obj, game_map)
 
 
 